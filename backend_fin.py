@@ -1,129 +1,393 @@
-import psycopg2
+import io
+import os
+from contextlib import contextmanager
+from psycopg2.extensions import connection
+from psycopg2.extras import execute_batch, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 
 # --- Database Connection ---
+# The hot, parameter-only-varying statements are prepared once per connection so
+# repeat calls skip parsing and planning on the server. Parameter types are left
+# for Postgres to infer from the target columns.
+PREPARED_STATEMENTS = (
+    "PREPARE get_goals_stmt AS SELECT g.goal_id, g.description, g.due_date, g.status, e.name as employee_name "
+    "FROM goal g JOIN employee e ON g.employee_id = e.employee_id WHERE g.employee_id = $1;",
+    "PREPARE get_tasks_stmt AS SELECT task_id, description, is_approved FROM task WHERE goal_id = $1;",
+    "PREPARE create_task_stmt AS INSERT INTO task (goal_id, description) VALUES ($1, $2);",
+    "PREPARE update_goal_status_stmt AS UPDATE goal SET status = $1 WHERE goal_id = $2;",
+    "PREPARE approve_task_stmt AS UPDATE task SET is_approved = TRUE WHERE task_id = $1;",
+)
+
+class PooledConnection(connection):
+    """A pooled connection that prepares PREPARED_STATEMENTS once."""
+    prepared = False
+
+    def prepare_statements(self):
+        with self:
+            with self.cursor() as cursor:
+                # PREPARE survives a rollback, so clear what an earlier failed attempt left behind
+                cursor.execute("DEALLOCATE ALL;")
+                for statement in PREPARED_STATEMENTS:
+                    cursor.execute(statement)
+        self.prepared = True
+
 @st.cache_resource
-def get_db_connection():
-    """Establishes and caches a connection to the PostgreSQL database."""
+def get_db_pool():
+    """Creates and caches a thread-safe pool of connections to the PostgreSQL database."""
     try:
-        conn = psycopg2.connect(
+        pool = ThreadedConnectionPool(
+            2, 20,
             dbname="pms2",
             user="postgres",
-            password="Yash",
-            host="localhost"
+            # Unset falls back to libpq's PGPASSWORD / ~/.pgpass lookup
+            password=os.environ.get("PMS_DB_PASSWORD"),
+            host="localhost",
+            # Keep idle sessions' connections alive through NAT/firewall timeouts
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=3,
+            connection_factory=PooledConnection
         )
-        return conn
+        init_indexes(pool)
+        return pool
     except Exception as e:
         st.error(f"Error connecting to the database: {e}")
         return None
 
+@contextmanager
+def pooled_connection(pool):
+    """Borrows a connection from the pool and hands it back once the caller is done."""
+    conn = pool.getconn()
+    try:
+        if not conn.prepared:
+            conn.prepare_statements()
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+# Indexes behind the goal/task/feedback joins and status grouping. The INCLUDE
+# columns let the COUNT aggregates in the insights query use index-only scans.
+INDEX_STATEMENTS = (
+    "CREATE INDEX IF NOT EXISTS ix_task_goal ON task (goal_id) INCLUDE (task_id);",
+    "CREATE INDEX IF NOT EXISTS ix_feedback_goal ON feedback (goal_id) INCLUDE (feedback_id);",
+    "CREATE INDEX IF NOT EXISTS ix_goal_employee ON goal (employee_id);",
+    "CREATE INDEX IF NOT EXISTS ix_goal_status ON goal (status);",
+)
+
+def init_indexes(pool):
+    """Creates any missing indexes once, when the pool is first set up."""
+    try:
+        with pooled_connection(pool) as conn, conn:
+            with conn.cursor() as cursor:
+                for statement in INDEX_STATEMENTS:
+                    cursor.execute(statement)
+    except Exception as e:
+        st.error(f"Error creating database indexes: {e}")
+
+def rows_to_frame(cols, rows):
+    """Builds an Arrow-backed DataFrame column by column, skipping NumPy object columns."""
+    columns = list(zip(*rows)) if rows else [()] * len(cols)
+    table = pa.Table.from_arrays([pa.array(column) for column in columns], names=cols)
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+# Arrow types that rows_to_frame infers from psycopg2's values, keyed by Postgres type OID.
+# Only types whose inferred Arrow type doesn't depend on the values are listed. Others, such
+# as timestamptz (tz from the session offset) and numeric (precision from the data), stay null.
+ARROW_TYPES = {
+    16: pa.bool_(),
+    20: pa.int64(), 21: pa.int64(), 23: pa.int64(),
+    700: pa.float64(), 701: pa.float64(),
+    19: pa.string(), 25: pa.string(), 1042: pa.string(), 1043: pa.string(),
+    1082: pa.date32(),
+    1114: pa.timestamp("us"),
+}
+
+# Empty results are common in the UI's empty states, so one template frame per result shape is
+# kept. Building it means an Arrow schema plus a pandas conversion. A copy of a zero-row frame
+# is only a little metadata, and it keeps PMSBackend.run_query callers from mutating the template.
+_EMPTY_FRAMES = {}
+
+def empty_frame(description):
+    """Returns an empty DataFrame typed from a cursor description; each caller gets its own copy."""
+    key = tuple((desc[0], desc[1]) for desc in description)
+    if key not in _EMPTY_FRAMES:
+        schema = pa.schema([(name, ARROW_TYPES.get(oid, pa.null())) for name, oid in key])
+        _EMPTY_FRAMES[key] = schema.empty_table().to_pandas(types_mapper=pd.ArrowDtype)
+    return _EMPTY_FRAMES[key].copy()
+
+def run_query(query, params=None, fetch=True, large=False):
+    """A general-purpose method to run SQL queries."""
+    pool = get_db_pool()
+    if not pool:
+        return pd.DataFrame() if fetch else False
+
+    try:
+        # The connection context commits on success and rolls back on error
+        with pooled_connection(pool) as conn, conn:
+            # A cursor per call, so no result set outlives the call on an idle pooled connection
+            with conn.cursor() as cursor:
+                if fetch and large:
+                    # Stream big result sets as CSV through COPY instead of building a Python tuple per row
+                    sql = cursor.mogrify(query, params).decode().strip().rstrip(';')
+                    buf = io.StringIO()
+                    cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH CSV HEADER", buf)
+                    buf.seek(0)
+                    return pd.read_csv(buf, dtype_backend="pyarrow")
+                cursor.execute(query, params)
+                if fetch:
+                    # Get column names from the cursor description
+                    cols = [desc[0] for desc in cursor.description]
+                    if cursor.rowcount == 0:
+                        return empty_frame(cursor.description)
+                    df = rows_to_frame(cols, cursor.fetchall())
+                    return df
+                return True
+    except Exception as e:
+        st.error(f"Database operation failed: {e}")
+        return False
+
+def run_bulk(query, rows, page_size=500, executor=execute_values):
+    """Runs a query for many rows per round-trip: execute_values for `VALUES %s` inserts, execute_batch otherwise."""
+    pool = get_db_pool()
+    if not pool:
+        return False
+
+    try:
+        with pooled_connection(pool) as conn, conn:
+            with conn.cursor() as cursor:
+                executor(cursor, query, rows, page_size=page_size)
+                return True
+    except Exception as e:
+        st.error(f"Database operation failed: {e}")
+        return False
+
+class QueryError(Exception):
+    """Raised by the cached readers when their query fails, so st.cache_data never stores the failure."""
+
+def checked(result):
+    """Passes a run_query result through, raising QueryError if the query failed."""
+    if result is False:
+        raise QueryError("Database query failed")
+    return result
+
+# Goals per page returned by get_goals_page.
+GOALS_PAGE_SIZE = 500
+
+GOALS_QUERY = "SELECT g.goal_id, g.description, g.due_date, g.status, e.name as employee_name FROM goal g JOIN employee e ON g.employee_id = e.employee_id"
+
 # --- CRUD Operations ---
 class PMSBackend:
     def __init__(self):
-        self.conn = get_db_connection()
+        self.pool = get_db_pool()
 
-    def run_query(self, query, params=None, fetch=True):
+    def run_query(self, query, params=None, fetch=True, large=False):
         """A general-purpose method to run SQL queries."""
-        if not self.conn:
-            return pd.DataFrame() if fetch else False
-        
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute(query, params)
-            if fetch:
-                # Get column names from the cursor description
-                cols = [desc[0] for desc in cursor.description]
-                data = cursor.fetchall()
-                df = pd.DataFrame(data, columns=cols)
-                return df
-            else:
-                self.conn.commit()
-                return True
-        except Exception as e:
-            self.conn.rollback()
-            st.error(f"Database operation failed: {e}")
-            return False
-        finally:
-            cursor.close()
+        return run_query(query, params, fetch, large)
+
+    def _invalidate(self, *readers):
+        """Drops the cached results of the given read operations after a write."""
+        for reader in readers:
+            reader.clear()
 
     # --- Create Operations ---
     def create_goal(self, employee_id, manager_id, description, due_date, status='In Progress'):
         query = "INSERT INTO goal (employee_id, manager_id, description, due_date, status) VALUES (%s, %s, %s, %s, %s);"
-        return self.run_query(query, (employee_id, manager_id, description, due_date, status), fetch=False)
+        ok = self.run_query(query, (employee_id, manager_id, description, due_date, status), fetch=False)
+        if ok:
+            self._invalidate(self.get_goals, self.get_goals_page, self.get_goal_choices, self.get_business_insights)
+        return ok
 
     def create_task(self, goal_id, description):
-        query = "INSERT INTO task (goal_id, description) VALUES (%s, %s);"
-        return self.run_query(query, (goal_id, description), fetch=False)
+        query = "EXECUTE create_task_stmt(%s, %s);"
+        ok = self.run_query(query, (goal_id, description), fetch=False)
+        if ok:
+            self._invalidate(self.get_tasks, self.get_business_insights)
+        return ok
 
     def create_feedback(self, goal_id, manager_id, content):
         query = "INSERT INTO feedback (goal_id, manager_id, content) VALUES (%s, %s, %s);"
-        return self.run_query(query, (goal_id, manager_id, content), fetch=False)
+        ok = self.run_query(query, (goal_id, manager_id, content), fetch=False)
+        if ok:
+            self._invalidate(self.get_feedback, self.get_business_insights)
+        return ok
+
+    # --- Bulk Create Operations ---
+    def bulk_create_goals(self, rows):
+        """Rows are (employee_id, manager_id, description, due_date, status) tuples."""
+        query = "INSERT INTO goal (employee_id, manager_id, description, due_date, status) VALUES %s;"
+        ok = run_bulk(query, rows)
+        if ok:
+            self._invalidate(self.get_goals, self.get_goals_page, self.get_goal_choices, self.get_business_insights)
+        return ok
+
+    def bulk_create_tasks(self, rows):
+        """Rows are (goal_id, description) tuples."""
+        query = "INSERT INTO task (goal_id, description) VALUES %s;"
+        ok = run_bulk(query, rows)
+        if ok:
+            self._invalidate(self.get_tasks, self.get_business_insights)
+        return ok
+
+    def bulk_create_feedback(self, rows):
+        """Rows are (goal_id, manager_id, content) tuples."""
+        query = "INSERT INTO feedback (goal_id, manager_id, content) VALUES %s;"
+        ok = run_bulk(query, rows)
+        if ok:
+            self._invalidate(self.get_feedback, self.get_business_insights)
+        return ok
 
     # --- Read Operations ---
-    def get_goals(self, employee_id=None):
-        query = "SELECT g.goal_id, g.description, g.due_date, g.status, e.name as employee_name FROM goal g JOIN employee e ON g.employee_id = e.employee_id"
-        if employee_id:
-            query += " WHERE g.employee_id = %s"
-            return self.run_query(query, (employee_id,))
-        return self.run_query(query)
-
-    def get_tasks(self, goal_id):
-        query = "SELECT task_id, description, is_approved FROM task WHERE goal_id = %s;"
-        return self.run_query(query, (goal_id,))
-
-    def get_feedback(self, employee_id):
+    # Reads are cached for a short TTL so Streamlit reruns don't hit the database;
+    # the write operations above and below clear the caches they make stale.
+    # A failed read raises QueryError rather than caching the failure.
+    @staticmethod
+    @st.cache_data(ttl=30, show_spinner=False)
+    def get_goals(employee_id):
+        # Prepared per employee so repeat lookups reuse one plan that can use ix_goal_employee
+        query = "EXECUTE get_goals_stmt(%s);"
+        return checked(run_query(query, (employee_id,)))
+
+    @staticmethod
+    @st.cache_data(ttl=30, show_spinner=False)
+    def get_goals_page(after_id=0):
+        """Goals with goal_id > after_id, plus one extra row that tells the caller whether a next page exists."""
+        query = GOALS_QUERY + " WHERE g.goal_id > %s ORDER BY g.goal_id LIMIT %s;"
+        return checked(run_query(query, (after_id, GOALS_PAGE_SIZE + 1)))
+
+    def export_goals(self):
+        """Reads every goal through COPY for a full export; raises QueryError if it fails."""
+        return checked(run_query(GOALS_QUERY, large=True))
+
+    @staticmethod
+    @st.cache_data(ttl=15, show_spinner=False)
+    def get_goal_choices():
+        """Only the columns the goal pickers need."""
+        query = "SELECT goal_id, description FROM goal ORDER BY goal_id;"
+        return checked(run_query(query))
+
+    # Tasks change only through the writes that clear this cache, so they can live longer
+    @staticmethod
+    @st.cache_data(ttl=60, show_spinner=False)
+    def get_tasks(goal_id):
+        query = "EXECUTE get_tasks_stmt(%s);"
+        return checked(run_query(query, (goal_id,)))
+
+    @staticmethod
+    @st.cache_data(ttl=30, show_spinner=False)
+    def get_feedback(employee_id):
         query = """
-            SELECT f.content, f.timestamp, g.description as goal_description
+            SELECT f.content, floor(EXTRACT(epoch FROM f.timestamp::timestamp))::bigint AS ts, g.description as goal_description
             FROM feedback f
             JOIN goal g ON f.goal_id = g.goal_id
             WHERE g.employee_id = %s;
         """
-        return self.run_query(query, (employee_id,))
+        df = checked(run_query(query, (employee_id,))).rename(columns={'ts': 'timestamp'})
+        # Timestamps arrive as epoch seconds and become one Arrow timestamp column, rather than
+        # a Python datetime object per row. The ::timestamp cast makes the seconds the wall-clock
+        # time in the session's TimeZone (a no-op for a plain timestamp column), so they stay naive.
+        if 'timestamp' in df.columns:
+            df['timestamp'] = df['timestamp'].astype(pd.ArrowDtype(pa.timestamp("s")))
+        return df
 
     # --- Update Operations ---
     def update_goal_status(self, goal_id, new_status):
-        query = "UPDATE goal SET status = %s WHERE goal_id = %s;"
-        return self.run_query(query, (new_status, goal_id), fetch=False)
+        query = "EXECUTE update_goal_status_stmt(%s, %s);"
+        ok = self.run_query(query, (new_status, goal_id), fetch=False)
+        if ok:
+            self._invalidate(self.get_goals, self.get_goals_page, self.get_business_insights)
+        return ok
 
     def approve_task(self, task_id):
-        query = "UPDATE task SET is_approved = TRUE WHERE task_id = %s;"
-        return self.run_query(query, (task_id,), fetch=False)
+        query = "EXECUTE approve_task_stmt(%s);"
+        ok = self.run_query(query, (task_id,), fetch=False)
+        if ok:
+            self._invalidate(self.get_tasks)
+        return ok
 
     # --- Delete Operations ---
     def delete_goal(self, goal_id):
         query = "DELETE FROM goal WHERE goal_id = %s;"
-        return self.run_query(query, (goal_id,), fetch=False)
+        ok = self.run_query(query, (goal_id,), fetch=False)
+        if ok:
+            self._invalidate(self.get_goals, self.get_goals_page, self.get_goal_choices, self.get_tasks, self.get_feedback, self.get_business_insights)
+        return ok
+
+    # --- Bulk Update & Delete Operations ---
+    def bulk_update_goal_status(self, goal_ids, new_status):
+        query = "EXECUTE update_goal_status_stmt(%s, %s);"
+        ok = run_bulk(query, [(new_status, goal_id) for goal_id in goal_ids], page_size=100, executor=execute_batch)
+        if ok:
+            self._invalidate(self.get_goals, self.get_goals_page, self.get_business_insights)
+        return ok
+
+    def bulk_approve_tasks(self, task_ids):
+        query = "EXECUTE approve_task_stmt(%s);"
+        ok = run_bulk(query, [(task_id,) for task_id in task_ids], page_size=200, executor=execute_batch)
+        if ok:
+            self._invalidate(self.get_tasks)
+        return ok
+
+    def bulk_delete_goals(self, goal_ids):
+        query = "DELETE FROM goal WHERE goal_id = %s;"
+        ok = run_bulk(query, [(goal_id,) for goal_id in goal_ids], page_size=100, executor=execute_batch)
+        if ok:
+            self._invalidate(self.get_goals, self.get_goals_page, self.get_goal_choices, self.get_tasks, self.get_feedback, self.get_business_insights)
+        return ok
 
     # --- Business Insights ---
-    def get_business_insights(self):
-        insights = {}
-        # Insight 1: Total Goals and Status Breakdown
-        query1 = "SELECT status, COUNT(*) as total_goals FROM goal GROUP BY status;"
-        insights['goal_status'] = self.run_query(query1)
-        
-        # Insight 2: Average Goals Per Employee
-        query2 = "SELECT AVG(goal_count) FROM (SELECT COUNT(*) AS goal_count FROM goal GROUP BY employee_id) as subquery;"
-        insights['avg_goals_per_employee'] = self.run_query(query2).iloc[0, 0] if not self.run_query(query2).empty else 0
-
-        # Insight 3: Most Productive Employee (by tasks)
-        query3 = """
-            SELECT e.name, COUNT(t.task_id) as total_tasks
-            FROM task t JOIN goal g ON t.goal_id = g.goal_id
-            JOIN employee e ON g.employee_id = e.employee_id
-            GROUP BY e.name ORDER BY total_tasks DESC LIMIT 1;
-        """
-        df_tasks = self.run_query(query3)
-        insights['most_productive_employee'] = df_tasks.iloc[0, 0] if not df_tasks.empty else "N/A"
-
-        # Insight 4: Employee with the most feedback
-        query4 = """
-            SELECT e.name, COUNT(f.feedback_id) as total_feedback
-            FROM feedback f JOIN goal g ON f.goal_id = g.goal_id
-            JOIN employee e ON g.employee_id = e.employee_id
-            GROUP BY e.name ORDER BY total_feedback DESC LIMIT 1;
+    @staticmethod
+    @st.cache_data(ttl=30, show_spinner=False)
+    def get_business_insights():
+        insights = {
+            'goal_status': pd.DataFrame(columns=['status', 'total_goals']),
+            'total_goals': 0,
+            'avg_goals_per_employee': 0,
+            'most_productive_employee': "N/A",
+            'most_feedback_employee': "N/A",
+        }
+
+        # All four insights are fused into a single row so they cost one round-trip:
+        # 1. Total Goals and Status Breakdown
+        # 2. Average Goals Per Employee
+        # 3. Most Productive Employee (by tasks)
+        # 4. Employee with the most feedback
+        query = """
+            WITH goal_status AS (
+                SELECT status, COUNT(*) AS total_goals FROM goal GROUP BY status
+            ), goals_per_employee AS (
+                SELECT COUNT(*) AS goal_count FROM goal GROUP BY employee_id
+            ), top_tasks AS (
+                SELECT e.name
+                FROM task t JOIN goal g ON t.goal_id = g.goal_id
+                JOIN employee e ON g.employee_id = e.employee_id
+                GROUP BY e.name ORDER BY COUNT(t.task_id) DESC LIMIT 1
+            ), top_feedback AS (
+                SELECT e.name
+                FROM feedback f JOIN goal g ON f.goal_id = g.goal_id
+                JOIN employee e ON g.employee_id = e.employee_id
+                GROUP BY e.name ORDER BY COUNT(f.feedback_id) DESC LIMIT 1
+            )
+            SELECT
+                COALESCE((SELECT array_agg(status ORDER BY status) FROM goal_status), '{}') AS statuses,
+                COALESCE((SELECT array_agg(total_goals ORDER BY status) FROM goal_status), '{}') AS status_totals,
+                (SELECT COUNT(*) FROM goal) AS total_goals,
+                (SELECT COALESCE(AVG(goal_count), 0)::float FROM goals_per_employee) AS avg_goals_per_employee,
+                COALESCE((SELECT name FROM top_tasks), 'N/A') AS most_productive_employee,
+                COALESCE((SELECT name FROM top_feedback), 'N/A') AS most_feedback_employee;
         """
-        df_feedback = self.run_query(query4)
-        insights['most_feedback_employee'] = df_feedback.iloc[0, 0] if not df_feedback.empty else "N/A"
+        result = checked(run_query(query))
+        if result.empty:
+            return insights
+
+        insights['goal_status'] = pd.DataFrame({
+            'status': result['statuses'].iloc[0],
+            'total_goals': result['status_totals'].iloc[0],
+        })
+        for key in ('total_goals', 'avg_goals_per_employee', 'most_productive_employee', 'most_feedback_employee'):
+            insights[key] = result[key].iloc[0]
 
         return insights
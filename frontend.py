@@ -1,126 +1,406 @@
 import streamlit as st
-import psycopg2
+import io
+import os
+from contextlib import contextmanager
+from psycopg2.extensions import connection
+from psycopg2.extras import execute_batch, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import pandas as pd
+import pyarrow as pa
 import plotly.express as px
 from datetime import datetime
 
 # --- 1. Database Connection & Setup ---
+# The hot, parameter-only-varying statements are prepared once per connection so
+# repeat calls skip parsing and planning on the server. Parameter types are left
+# for Postgres to infer from the target columns.
+PREPARED_STATEMENTS = (
+    "PREPARE get_goals_stmt AS SELECT g.goal_id, g.description, g.due_date, g.status, e.name as employee_name "
+    "FROM goal g JOIN employee e ON g.employee_id = e.employee_id WHERE g.employee_id = $1;",
+    "PREPARE get_tasks_stmt AS SELECT task_id, description, is_approved FROM task WHERE goal_id = $1;",
+    "PREPARE create_task_stmt AS INSERT INTO task (goal_id, description) VALUES ($1, $2);",
+    "PREPARE update_goal_status_stmt AS UPDATE goal SET status = $1 WHERE goal_id = $2;",
+    "PREPARE approve_task_stmt AS UPDATE task SET is_approved = TRUE WHERE task_id = $1;",
+)
+
+class PooledConnection(connection):
+    """A pooled connection that prepares PREPARED_STATEMENTS once."""
+    prepared = False
+
+    def prepare_statements(self):
+        with self:
+            with self.cursor() as cursor:
+                # PREPARE survives a rollback, so clear what an earlier failed attempt left behind
+                cursor.execute("DEALLOCATE ALL;")
+                for statement in PREPARED_STATEMENTS:
+                    cursor.execute(statement)
+        self.prepared = True
+
 @st.cache_resource
-def get_db_connection():
-    """Establishes and caches a connection to the PostgreSQL database."""
+def get_db_pool():
+    """Creates and caches a thread-safe pool of connections to the PostgreSQL database."""
     try:
-        conn = psycopg2.connect(
+        pool = ThreadedConnectionPool(
+            2, 20,
             dbname="pms2",
             user="postgres",
-            password="Yash",
-            host="localhost"
+            # Unset falls back to libpq's PGPASSWORD / ~/.pgpass lookup
+            password=os.environ.get("PMS_DB_PASSWORD"),
+            host="localhost",
+            # Keep idle sessions' connections alive through NAT/firewall timeouts
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=3,
+            connection_factory=PooledConnection
         )
-        return conn
+        init_indexes(pool)
+        return pool
     except Exception as e:
         st.error(f"Error connecting to the database: {e}")
         return None
 
 # --- 2. Data Access & CRUD Operations ---
-def run_query(query, params=None, fetch=True):
+@contextmanager
+def pooled_connection(pool):
+    """Borrows a connection from the pool and hands it back once the caller is done."""
+    conn = pool.getconn()
+    try:
+        if not conn.prepared:
+            conn.prepare_statements()
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+# Indexes behind the goal/task/feedback joins and status grouping. The INCLUDE
+# columns let the COUNT aggregates in the insights query use index-only scans.
+INDEX_STATEMENTS = (
+    "CREATE INDEX IF NOT EXISTS ix_task_goal ON task (goal_id) INCLUDE (task_id);",
+    "CREATE INDEX IF NOT EXISTS ix_feedback_goal ON feedback (goal_id) INCLUDE (feedback_id);",
+    "CREATE INDEX IF NOT EXISTS ix_goal_employee ON goal (employee_id);",
+    "CREATE INDEX IF NOT EXISTS ix_goal_status ON goal (status);",
+)
+
+def init_indexes(pool):
+    """Creates any missing indexes once, when the pool is first set up."""
+    try:
+        with pooled_connection(pool) as conn, conn:
+            with conn.cursor() as cursor:
+                for statement in INDEX_STATEMENTS:
+                    cursor.execute(statement)
+    except Exception as e:
+        st.error(f"Error creating database indexes: {e}")
+
+def rows_to_frame(cols, rows):
+    """Builds an Arrow-backed DataFrame column by column, skipping NumPy object columns."""
+    columns = list(zip(*rows)) if rows else [()] * len(cols)
+    table = pa.Table.from_arrays([pa.array(column) for column in columns], names=cols)
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+# Arrow types that rows_to_frame infers from psycopg2's values, keyed by Postgres type OID.
+# Only types whose inferred Arrow type doesn't depend on the values are listed. Others, such
+# as timestamptz (tz from the session offset) and numeric (precision from the data), stay null.
+ARROW_TYPES = {
+    16: pa.bool_(),
+    20: pa.int64(), 21: pa.int64(), 23: pa.int64(),
+    700: pa.float64(), 701: pa.float64(),
+    19: pa.string(), 25: pa.string(), 1042: pa.string(), 1043: pa.string(),
+    1082: pa.date32(),
+    1114: pa.timestamp("us"),
+}
+
+# Empty results are common in the UI's empty states, so one template frame per result shape is
+# kept. Building it means an Arrow schema plus a pandas conversion. A copy of a zero-row frame
+# is only a little metadata, and it keeps PMSBackend.run_query callers from mutating the template.
+_EMPTY_FRAMES = {}
+
+def empty_frame(description):
+    """Returns an empty DataFrame typed from a cursor description; each caller gets its own copy."""
+    key = tuple((desc[0], desc[1]) for desc in description)
+    if key not in _EMPTY_FRAMES:
+        schema = pa.schema([(name, ARROW_TYPES.get(oid, pa.null())) for name, oid in key])
+        _EMPTY_FRAMES[key] = schema.empty_table().to_pandas(types_mapper=pd.ArrowDtype)
+    return _EMPTY_FRAMES[key].copy()
+
+def run_query(query, params=None, fetch=True, large=False):
     """A general-purpose method to run SQL queries and handle data."""
-    conn = get_db_connection()
-    if not conn:
+    pool = get_db_pool()
+    if not pool:
         return pd.DataFrame() if fetch else False
-    
+
     try:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        if fetch:
-            cols = [desc[0] for desc in cursor.description]
-            data = cursor.fetchall()
-            return pd.DataFrame(data, columns=cols)
-        else:
-            conn.commit()
-            return True
+        # The connection context commits on success and rolls back on error
+        with pooled_connection(pool) as conn, conn:
+            # A cursor per call, so no result set outlives the call on an idle pooled connection
+            with conn.cursor() as cursor:
+                if fetch and large:
+                    # Stream big result sets as CSV through COPY instead of building a Python tuple per row
+                    sql = cursor.mogrify(query, params).decode().strip().rstrip(';')
+                    buf = io.StringIO()
+                    cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH CSV HEADER", buf)
+                    buf.seek(0)
+                    return pd.read_csv(buf, dtype_backend="pyarrow")
+                cursor.execute(query, params)
+                if fetch:
+                    cols = [desc[0] for desc in cursor.description]
+                    if cursor.rowcount == 0:
+                        return empty_frame(cursor.description)
+                    return rows_to_frame(cols, cursor.fetchall())
+                return True
+    except Exception as e:
+        st.error(f"Database operation failed: {e}")
+        return False
+
+def run_bulk(query, rows, page_size=500, executor=execute_values):
+    """Runs a query for many rows per round-trip: execute_values for `VALUES %s` inserts, execute_batch otherwise."""
+    pool = get_db_pool()
+    if not pool:
+        return False
+
+    try:
+        with pooled_connection(pool) as conn, conn:
+            with conn.cursor() as cursor:
+                executor(cursor, query, rows, page_size=page_size)
+                return True
     except Exception as e:
-        conn.rollback()
         st.error(f"Database operation failed: {e}")
         return False
-    finally:
-        cursor.close()
 
-def get_goals(employee_id=None):
-    query = "SELECT g.goal_id, g.description, g.due_date, g.status, e.name as employee_name FROM goal g JOIN employee e ON g.employee_id = e.employee_id"
-    if employee_id:
-        query += " WHERE g.employee_id = %s"
-        return run_query(query, (employee_id,))
-    return run_query(query)
+class QueryError(Exception):
+    """Raised by the cached readers when their query fails, so st.cache_data never stores the failure."""
 
+def checked(result):
+    """Passes a run_query result through, raising QueryError if the query failed."""
+    if result is False:
+        raise QueryError("Database query failed")
+    return result
+
+GOALS_QUERY = "SELECT g.goal_id, g.description, g.due_date, g.status, e.name as employee_name FROM goal g JOIN employee e ON g.employee_id = e.employee_id"
+
+# Reads are cached for a short TTL so Streamlit reruns don't hit the database;
+# the write functions below clear the caches they make stale. A failed read
+# raises QueryError rather than caching the failure.
+@st.cache_data(ttl=30, show_spinner=False)
+def get_goals(employee_id):
+    # Prepared per employee so repeat lookups reuse one plan that can use ix_goal_employee
+    query = "EXECUTE get_goals_stmt(%s);"
+    return checked(run_query(query, (employee_id,)))
+
+# Goals shown per page on Goal Management.
+GOALS_PAGE_SIZE = 500
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_goals_page(after_id=0):
+    """Goals with goal_id > after_id, plus one extra row that tells the caller whether a next page exists."""
+    query = GOALS_QUERY + " WHERE g.goal_id > %s ORDER BY g.goal_id LIMIT %s;"
+    return checked(run_query(query, (after_id, GOALS_PAGE_SIZE + 1)))
+
+def export_goals():
+    """Reads every goal through COPY for the CSV download."""
+    return checked(run_query(GOALS_QUERY, large=True))
+
+@st.cache_data(ttl=15, show_spinner=False)
+def get_goal_choices():
+    """Only the columns the goal pickers need."""
+    query = "SELECT goal_id, description FROM goal ORDER BY goal_id;"
+    return checked(run_query(query))
+
+# Tasks change only through the writes that clear this cache, so they can live longer
+@st.cache_data(ttl=60, show_spinner=False)
 def get_tasks(goal_id):
-    query = "SELECT task_id, description, is_approved FROM task WHERE goal_id = %s;"
-    return run_query(query, (goal_id,))
+    query = "EXECUTE get_tasks_stmt(%s);"
+    return checked(run_query(query, (goal_id,)))
 
+@st.cache_data(ttl=30, show_spinner=False)
 def get_feedback(employee_id):
     query = """
-        SELECT f.content, f.timestamp, g.description as goal_description
+        SELECT f.content, floor(EXTRACT(epoch FROM f.timestamp::timestamp))::bigint AS ts, g.description as goal_description
         FROM feedback f
         JOIN goal g ON f.goal_id = g.goal_id
         WHERE g.employee_id = %s;
     """
-    return run_query(query, (employee_id,))
+    df = checked(run_query(query, (employee_id,))).rename(columns={'ts': 'timestamp'})
+    # Timestamps arrive as epoch seconds and become one Arrow timestamp column, rather than
+    # a Python datetime object per row. The ::timestamp cast makes the seconds the wall-clock
+    # time in the session's TimeZone (a no-op for a plain timestamp column), so they stay naive.
+    if 'timestamp' in df.columns:
+        df['timestamp'] = df['timestamp'].astype(pd.ArrowDtype(pa.timestamp("s")))
+    return df
+
+def invalidate(*readers):
+    """Drops the cached results of the given read functions after a write."""
+    for reader in readers:
+        reader.clear()
 
 def create_goal(employee_id, manager_id, description, due_date, status='In Progress'):
     query = "INSERT INTO goal (employee_id, manager_id, description, due_date, status) VALUES (%s, %s, %s, %s, %s);"
-    return run_query(query, (employee_id, manager_id, description, due_date, status), fetch=False)
+    ok = run_query(query, (employee_id, manager_id, description, due_date, status), fetch=False)
+    if ok:
+        invalidate(get_goals, get_goals_page, get_goal_choices, get_business_insights)
+    return ok
 
 def create_task(goal_id, description):
-    query = "INSERT INTO task (goal_id, description) VALUES (%s, %s);"
-    return run_query(query, (goal_id, description), fetch=False)
+    query = "EXECUTE create_task_stmt(%s, %s);"
+    ok = run_query(query, (goal_id, description), fetch=False)
+    if ok:
+        invalidate(get_tasks, get_business_insights)
+    return ok
 
 def create_feedback(goal_id, manager_id, content):
     query = "INSERT INTO feedback (goal_id, manager_id, content) VALUES (%s, %s, %s);"
-    return run_query(query, (goal_id, manager_id, content), fetch=False)
+    ok = run_query(query, (goal_id, manager_id, content), fetch=False)
+    if ok:
+        invalidate(get_feedback, get_business_insights)
+    return ok
+
+def bulk_create_goals(rows):
+    """Rows are (employee_id, manager_id, description, due_date, status) tuples."""
+    query = "INSERT INTO goal (employee_id, manager_id, description, due_date, status) VALUES %s;"
+    ok = run_bulk(query, rows)
+    if ok:
+        invalidate(get_goals, get_goals_page, get_goal_choices, get_business_insights)
+    return ok
+
+def bulk_create_tasks(rows):
+    """Rows are (goal_id, description) tuples."""
+    query = "INSERT INTO task (goal_id, description) VALUES %s;"
+    ok = run_bulk(query, rows)
+    if ok:
+        invalidate(get_tasks, get_business_insights)
+    return ok
+
+def bulk_create_feedback(rows):
+    """Rows are (goal_id, manager_id, content) tuples."""
+    query = "INSERT INTO feedback (goal_id, manager_id, content) VALUES %s;"
+    ok = run_bulk(query, rows)
+    if ok:
+        invalidate(get_feedback, get_business_insights)
+    return ok
 
 def update_goal_status(goal_id, new_status):
-    query = "UPDATE goal SET status = %s WHERE goal_id = %s;"
-    return run_query(query, (new_status, goal_id), fetch=False)
+    query = "EXECUTE update_goal_status_stmt(%s, %s);"
+    ok = run_query(query, (new_status, goal_id), fetch=False)
+    if ok:
+        invalidate(get_goals, get_goals_page, get_business_insights)
+    return ok
 
 def approve_task(task_id):
-    query = "UPDATE task SET is_approved = TRUE WHERE task_id = %s;"
-    return run_query(query, (task_id,), fetch=False)
+    query = "EXECUTE approve_task_stmt(%s);"
+    ok = run_query(query, (task_id,), fetch=False)
+    if ok:
+        invalidate(get_tasks)
+    return ok
 
 def delete_goal(goal_id):
     query = "DELETE FROM goal WHERE goal_id = %s;"
-    return run_query(query, (goal_id,), fetch=False)
+    ok = run_query(query, (goal_id,), fetch=False)
+    if ok:
+        invalidate(get_goals, get_goals_page, get_goal_choices, get_tasks, get_feedback, get_business_insights)
+    return ok
+
+def bulk_update_goal_status(goal_ids, new_status):
+    query = "EXECUTE update_goal_status_stmt(%s, %s);"
+    ok = run_bulk(query, [(new_status, goal_id) for goal_id in goal_ids], page_size=100, executor=execute_batch)
+    if ok:
+        invalidate(get_goals, get_goals_page, get_business_insights)
+    return ok
+
+def bulk_approve_tasks(task_ids):
+    query = "EXECUTE approve_task_stmt(%s);"
+    ok = run_bulk(query, [(task_id,) for task_id in task_ids], page_size=200, executor=execute_batch)
+    if ok:
+        invalidate(get_tasks)
+    return ok
 
+def bulk_delete_goals(goal_ids):
+    query = "DELETE FROM goal WHERE goal_id = %s;"
+    ok = run_bulk(query, [(goal_id,) for goal_id in goal_ids], page_size=100, executor=execute_batch)
+    if ok:
+        invalidate(get_goals, get_goals_page, get_goal_choices, get_tasks, get_feedback, get_business_insights)
+    return ok
+
+@st.cache_data(ttl=30, show_spinner=False)
 def get_business_insights():
     """Gathers key business metrics for the dashboard."""
-    insights = {}
-    
-    # Corrected query to handle cases with no goals
-    query1 = "SELECT status, COUNT(*) as total_goals FROM goal GROUP BY status;"
-    insights['goal_status'] = run_query(query1)
-    
-    # Fix for the TypeError: Using COALESCE to return 0 instead of NULL
-    query2 = "SELECT COALESCE(AVG(goal_count), 0) FROM (SELECT COUNT(*) AS goal_count FROM goal GROUP BY employee_id) as subquery;"
-    result = run_query(query2)
-    insights['avg_goals_per_employee'] = result.iloc[0, 0] if not result.empty else 0
-    
-    query3 = """
-        SELECT e.name, COUNT(t.task_id) as total_tasks
-        FROM task t JOIN goal g ON t.goal_id = g.goal_id
-        JOIN employee e ON g.employee_id = e.employee_id
-        GROUP BY e.name ORDER BY total_tasks DESC LIMIT 1;
-    """
-    df_tasks = run_query(query3)
-    insights['most_productive_employee'] = df_tasks.iloc[0, 0] if not df_tasks.empty else "N/A"
-    
-    query4 = """
-        SELECT e.name, COUNT(f.feedback_id) as total_feedback
-        FROM feedback f JOIN goal g ON f.goal_id = g.goal_id
-        JOIN employee e ON g.employee_id = e.employee_id
-        GROUP BY e.name ORDER BY total_feedback DESC LIMIT 1;
+    insights = {
+        'goal_status': pd.DataFrame(columns=['status', 'total_goals']),
+        'total_goals': 0,
+        'avg_goals_per_employee': 0,
+        'most_productive_employee': "N/A",
+        'most_feedback_employee': "N/A",
+    }
+
+    # All metrics come back as a single row so the dashboard costs one round-trip.
+    # COALESCE keeps the defaults above when there are no goals, tasks or feedback.
+    query = """
+        WITH goal_status AS (
+            SELECT status, COUNT(*) AS total_goals FROM goal GROUP BY status
+        ), goals_per_employee AS (
+            SELECT COUNT(*) AS goal_count FROM goal GROUP BY employee_id
+        ), top_tasks AS (
+            SELECT e.name
+            FROM task t JOIN goal g ON t.goal_id = g.goal_id
+            JOIN employee e ON g.employee_id = e.employee_id
+            GROUP BY e.name ORDER BY COUNT(t.task_id) DESC LIMIT 1
+        ), top_feedback AS (
+            SELECT e.name
+            FROM feedback f JOIN goal g ON f.goal_id = g.goal_id
+            JOIN employee e ON g.employee_id = e.employee_id
+            GROUP BY e.name ORDER BY COUNT(f.feedback_id) DESC LIMIT 1
+        )
+        SELECT
+            COALESCE((SELECT array_agg(status ORDER BY status) FROM goal_status), '{}') AS statuses,
+            COALESCE((SELECT array_agg(total_goals ORDER BY status) FROM goal_status), '{}') AS status_totals,
+            (SELECT COUNT(*) FROM goal) AS total_goals,
+            (SELECT COALESCE(AVG(goal_count), 0)::float FROM goals_per_employee) AS avg_goals_per_employee,
+            COALESCE((SELECT name FROM top_tasks), 'N/A') AS most_productive_employee,
+            COALESCE((SELECT name FROM top_feedback), 'N/A') AS most_feedback_employee;
     """
-    df_feedback = run_query(query4)
-    insights['most_feedback_employee'] = df_feedback.iloc[0, 0] if not df_feedback.empty else "N/A"
-    
+    result = checked(run_query(query))
+    if result.empty:
+        return insights
+
+    insights['goal_status'] = pd.DataFrame({
+        'status': result['statuses'].iloc[0],
+        'total_goals': result['status_totals'].iloc[0],
+    })
+    for key in ('total_goals', 'avg_goals_per_employee', 'most_productive_employee', 'most_feedback_employee'):
+        insights[key] = result[key].iloc[0]
+
     return insights
 
+def read_or_empty(reader, *args, **kwargs):
+    """Calls a cached reader, showing an empty frame if its query failed (the error is already reported)."""
+    try:
+        return reader(*args, **kwargs)
+    except QueryError:
+        return pd.DataFrame()
+
+def parse_task_upload(tasks_csv):
+    """Parses an uploaded tasks CSV into (goal_id, description) rows, or returns an error message."""
+    try:
+        df_upload = pd.read_csv(tasks_csv)
+    except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError) as e:
+        return [], f"Could not read the CSV: {e}"
+    if not {'goal_id', 'description'}.issubset(df_upload.columns):
+        return [], "The CSV must contain 'goal_id' and 'description' columns."
+
+    goal_ids = pd.to_numeric(df_upload['goal_id'], errors="coerce")
+    descriptions = df_upload['description'].astype("string").str.strip()
+    valid = (goal_ids.notna() & (goal_ids % 1 == 0) & descriptions.notna() & (descriptions != "")).fillna(False)
+    if not valid.all():
+        # Line numbers as seen in the file: one for the header, one for 1-based counting
+        bad_lines = ", ".join(str(index + 2) for index in df_upload.index[~valid])
+        return [], f"Nothing was uploaded: missing or non-integer goal_id, or empty description, on CSV lines {bad_lines}."
+    return [(int(goal_id), description) for goal_id, description in zip(goal_ids, descriptions)], None
+
+# Figures are memoized on the content of the status breakdown (st.cache_data hashes
+# DataFrame arguments by value). The cached value is the figure's plain dict, because
+# unpickling a go.Figure would rerun Plotly's property validation on every cache hit.
+@st.cache_data(show_spinner=False)
+def build_status_pie(df_status):
+    return px.pie(df_status, values='total_goals', names='status', title='Goal Status Distribution').to_dict()
+
 # --- 3. Streamlit UI (Frontend) ---
 st.set_page_config(layout="wide")
 st.title("🎯 Performance Management System")
@@ -130,9 +410,13 @@ st.sidebar.title("Navigation")
 page = st.sidebar.radio("Go to", ["Dashboard", "Goal Management", "Task Management", "Feedback & History"])
 
 # --- Dashboard ---
-if page == "Dashboard":
+@st.fragment
+def dashboard_page():
     st.header("Analytics & Business Insights")
-    insights = get_business_insights()
+    try:
+        insights = get_business_insights()
+    except QueryError:
+        return
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -142,19 +426,19 @@ if page == "Dashboard":
     with col3:
         st.metric("Employee with Most Feedback", insights['most_feedback_employee'])
     with col4:
-        st.metric("Total Goals", insights['goal_status']['total_goals'].sum() if not insights['goal_status'].empty else 0)
+        st.metric("Total Goals", insights['total_goals'])
 
     st.markdown("---")
     
     st.subheader("Goal Status Breakdown")
     if not insights['goal_status'].empty:
-        fig_pie = px.pie(insights['goal_status'], values='total_goals', names='status', title='Goal Status Distribution')
-        st.plotly_chart(fig_pie, use_container_width=True)
+        st.plotly_chart(build_status_pie(insights['goal_status']), use_container_width=True)
     else:
         st.info("No data available for goals.")
 
 # --- Goal Management (CRUD) ---
-elif page == "Goal Management":
+@st.fragment
+def goal_management_page():
     st.header("Goal Management (Manager)")
     
     st.subheader("Create a New Goal")
@@ -173,10 +457,32 @@ elif page == "Goal Management":
     st.markdown("---")
     
     st.subheader("View & Manage Goals")
-    df_goals = get_goals()
+    # Keyset paging: the list holds the goal_id each visited page starts after
+    page_starts = st.session_state.setdefault("goal_page_starts", [0])
+    df_goals = read_or_empty(get_goals_page, page_starts[-1])
+    if df_goals.empty and len(page_starts) > 1:
+        # The current page emptied out (its goals were deleted), so start over
+        page_starts[:] = [0]
+        df_goals = read_or_empty(get_goals_page, 0)
     if not df_goals.empty:
+        has_next_page = len(df_goals) > GOALS_PAGE_SIZE
+        df_goals = df_goals.iloc[:GOALS_PAGE_SIZE]
         st.dataframe(df_goals, use_container_width=True)
-        
+
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            st.button("Previous Page", on_click=page_starts.pop, disabled=len(page_starts) == 1)
+        with page_col:
+            st.caption(f"Page {len(page_starts)}")
+        with next_col:
+            st.button("Next Page", on_click=page_starts.append, args=(int(df_goals['goal_id'].iloc[-1]),), disabled=not has_next_page)
+        # The full table is exported through COPY on demand
+        if has_next_page or len(page_starts) > 1:
+            if st.button("Prepare full export"):
+                df_export = read_or_empty(export_goals)
+                if not df_export.empty:
+                    st.download_button("Download all goals (CSV)", df_export.to_csv(index=False), "goals.csv", "text/csv")
+
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("Update Goal Status")
@@ -185,7 +491,7 @@ elif page == "Goal Management":
             if st.button("Update Status"):
                 if update_goal_status(goal_id_to_update, new_status):
                     st.success("Goal status updated!")
-                    st.experimental_rerun()
+                    st.rerun()
                 else:
                     st.error("Failed to update goal status.")
         
@@ -195,14 +501,15 @@ elif page == "Goal Management":
             if st.button("Delete Goal"):
                 if delete_goal(goal_id_to_delete):
                     st.success("Goal deleted successfully.")
-                    st.experimental_rerun()
+                    st.rerun()
                 else:
                     st.error("Failed to delete goal.")
     else:
         st.info("No goals have been set yet.")
 
 # --- Task Management ---
-elif page == "Task Management":
+@st.fragment
+def task_management_page():
     st.header("Task Management (Employee)")
     
     st.subheader("Log a New Task")
@@ -215,18 +522,32 @@ elif page == "Task Management":
                 st.success("Task logged successfully!")
             else:
                 st.error("Failed to log task.")
+
+    st.subheader("Bulk Upload Tasks")
+    tasks_csv = st.file_uploader("CSV with 'goal_id' and 'description' columns", type="csv")
+    if tasks_csv is not None and st.button("Upload Tasks"):
+        rows, upload_error = parse_task_upload(tasks_csv)
+        if upload_error:
+            st.error(upload_error)
+        elif not rows:
+            st.info("The uploaded CSV has no tasks.")
+        elif bulk_create_tasks(rows):
+            st.success(f"{len(rows)} tasks logged successfully!")
+        else:
+            st.error("Failed to log tasks.")
     
     st.markdown("---")
     
     st.subheader("Approve Tasks (Manager)")
-    df_goals_with_tasks = get_goals()
-    if not df_goals_with_tasks.empty:
+    df_goal_choices = read_or_empty(get_goal_choices)
+    if not df_goal_choices.empty:
+        goal_descriptions = dict(zip(df_goal_choices['goal_id'], df_goal_choices['description']))
         goal_id_to_view = st.selectbox(
             "Select Goal to View Tasks", 
-            df_goals_with_tasks['goal_id'], 
-            format_func=lambda x: f"Goal {x}: {df_goals_with_tasks[df_goals_with_tasks['goal_id'] == x]['description'].iloc[0]}"
+            df_goal_choices['goal_id'], 
+            format_func=lambda x: f"Goal {x}: {goal_descriptions[x]}"
         )
-        df_tasks = get_tasks(goal_id_to_view)
+        df_tasks = read_or_empty(get_tasks, goal_id_to_view)
         
         if not df_tasks.empty:
             st.dataframe(df_tasks, use_container_width=True)
@@ -234,16 +555,25 @@ elif page == "Task Management":
             if st.button("Approve Task"):
                 if approve_task(task_id_to_approve):
                     st.success("Task approved!")
-                    st.experimental_rerun()
+                    st.rerun()
                 else:
                     st.error("Failed to approve task.")
+
+            tasks_to_approve = st.multiselect("Tasks to Approve", list(df_tasks['task_id']))
+            if st.button("Approve Selected") and tasks_to_approve:
+                if bulk_approve_tasks([int(task_id) for task_id in tasks_to_approve]):
+                    st.success(f"{len(tasks_to_approve)} tasks approved!")
+                    st.rerun()
+                else:
+                    st.error("Failed to approve tasks.")
         else:
             st.info("No tasks logged for this goal.")
     else:
         st.info("No goals to manage tasks for.")
 
 # --- Feedback & Reporting ---
-elif page == "Feedback & History":
+@st.fragment
+def feedback_history_page():
     st.header("Feedback & Performance History")
     
     st.subheader("Provide Feedback (Manager)")
@@ -264,15 +594,24 @@ elif page == "Feedback & History":
     employee_id_history = st.number_input("Enter Employee ID to view history", min_value=1)
     
     st.markdown("#### Goal History")
-    df_goals_history = get_goals(employee_id=employee_id_history)
+    df_goals_history = read_or_empty(get_goals, employee_id=employee_id_history)
     if not df_goals_history.empty:
         st.dataframe(df_goals_history, use_container_width=True)
     else:
         st.info("No goals found for this employee.")
     
     st.markdown("#### Feedback History")
-    df_feedback_history = get_feedback(employee_id=employee_id_history)
+    df_feedback_history = read_or_empty(get_feedback, employee_id=employee_id_history)
     if not df_feedback_history.empty:
         st.dataframe(df_feedback_history, use_container_width=True)
     else:
         st.info("No feedback found for this employee.")
+
+# Pages are fragments, so their widgets rerun only the current page, not the whole script
+PAGES = {
+    "Dashboard": dashboard_page,
+    "Goal Management": goal_management_page,
+    "Task Management": task_management_page,
+    "Feedback & History": feedback_history_page,
+}
+PAGES[page]()